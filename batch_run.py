@@ -9,10 +9,13 @@ Lance plusieurs scénarios de simulation et enregistre, pour chacun, dans plots/
 """
 
 import os
-import time
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-import matplotlib.pyplot as plt
-from server_model import ServerModel, RequestEvent
+# Figures construites directement (sans pyplot) : pas de backend GUI ni de registre global
+from matplotlib.figure import Figure
+from server_model import ServerModel
+from simulate_and_plot import decimate
 
 # ---------- LISTE DE SCÉNARIOS (modifie librement) ----------
 SCENARIOS = [
@@ -23,63 +26,69 @@ SCENARIOS = [
 # ------------------------------------------------------------
 
 OUT_ROOT = "plots"
+CDF_POINTS = 1001   # nb de points tracés pour une CDF, quelle que soit la taille de l'échantillon
 
 def ensure_dir(path: str):
     if not os.path.exists(path):
         os.makedirs(path, exist_ok=True)
 
 def run_scenario(cfg: dict):
-    """Exécute un scénario et renvoie (times, loads, qlens, latencies)."""
-    steps = int(cfg["duration_s"] / cfg["dt"])
+    """Exécute un scénario et renvoie (times, loads, qlens, latencies) ; séries en ndarray."""
+    # Paramètres lus une fois (pas de recherche dans cfg à chaque pas)
+    dt = cfg["dt"]
+    mean_cost = cfg["mean_cost"]
+    capacity = cfg["capacity"]
+    lam = cfg["attackers"] * cfg["rate"] * dt
+    steps = int(cfg["duration_s"] / dt)
     rng = np.random.default_rng(cfg["seed"])
-    srv = ServerModel(processing_capacity_per_sec=cfg["capacity"])
-
-    times, loads, qlens = [], [], []
-
+    # Historique complet nécessaire pour latencies.csv et la CDF
+    srv = ServerModel(processing_capacity_per_sec=capacity, keep_latency_history=True,
+                      thread_safe=False)
+
+    # Tirages aléatoires de tout le scénario en deux appels vectorisés
+    arrivals_arr = rng.poisson(lam=lam, size=steps)
+    total = int(arrivals_arr.sum())
+    costs = rng.exponential(mean_cost, size=total)
+    # offsets[i]:offsets[i+1] = coûts des arrivées du pas i
+    offsets = np.concatenate(([0], np.cumsum(arrivals_arr)))
+
+    # Séries préallouées, remplies par indice
+    times = np.arange(steps) * dt
+    loads = np.empty(steps)
+    qlens = np.empty(steps, dtype=np.int64)
+
+    # Temps simulé : latences déterministes pour une graine donnée
     for i in range(steps):
-        t = i * cfg["dt"]
-        lam = cfg["attackers"] * cfg["rate"] * cfg["dt"]
-        arrivals = int(rng.poisson(lam=lam))
-        for _ in range(arrivals):
-            cost = float(rng.exponential(cfg["mean_cost"]))
-            srv.enqueue(RequestEvent(timestamp=time.time(), cost=cost))
+        t = float(times[i])
+        srv.enqueue_many(costs[offsets[i]:offsets[i + 1]], t)
 
-        stats = srv.step(dt=cfg["dt"])
-        _, load = srv.get_state()
-        times.append(t)
-        loads.append(load)
-        qlens.append(stats['queue_len'])
+        _, qlens[i], loads[i] = srv.step_fast(dt=dt, now=t + dt)
 
-    return times, loads, qlens, list(srv.latencies)
+    return times, loads, qlens, srv.latency_history
 
 def save_csv_metrics(times, loads, qlens, outdir):
-    import csv
     ensure_dir(outdir)
     path = os.path.join(outdir, "metrics.csv")
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
-        w.writerow(["time_s", "load_percent", "queue_len"])
-        for t, l, q in zip(times, loads, qlens):
-            w.writerow([f"{t:.2f}", f"{l:.6f}", q])
+    # Écriture en un seul appel, formats par colonne
+    np.savetxt(path, np.column_stack([times, loads, qlens]),
+               fmt=["%.2f", "%.6f", "%d"], delimiter=",",
+               header="time_s,load_percent,queue_len", comments="", encoding="utf-8")
     print(f"Saved {path}")
 
 def save_csv_latencies(latencies, outdir):
-    import csv
     ensure_dir(outdir)
     path = os.path.join(outdir, "latencies.csv")
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
-        w.writerow(["latency_s"])
-        for x in latencies:
-            w.writerow([f"{x:.6f}"])
+    np.savetxt(path, np.asarray(latencies, dtype=float), fmt="%.6f",
+               header="latency_s", comments="", encoding="utf-8")
     print(f"Saved {path}")
 
 def save_plots(times, loads, qlens, latencies, outdir):
     ensure_dir(outdir)
 
     # Charge (%)
-    fig1, ax1 = plt.subplots(figsize=(10,4))
-    ax1.plot(times, loads)
+    fig1 = Figure(figsize=(10,4))
+    ax1 = fig1.subplots()
+    ax1.plot(*decimate(times, loads))
     ax1.set_xlabel("Temps (s)")
     ax1.set_ylabel("Charge serveur (%)")
     ax1.set_title("Charge serveur (%) vs Temps")
@@ -90,8 +99,9 @@ def save_plots(times, loads, qlens, latencies, outdir):
     print(f"Saved {p1}")
 
     # Longueur de file
-    fig2, ax2 = plt.subplots(figsize=(10,4))
-    ax2.plot(times, qlens)
+    fig2 = Figure(figsize=(10,4))
+    ax2 = fig2.subplots()
+    ax2.plot(*decimate(times, qlens))
     ax2.set_xlabel("Temps (s)")
     ax2.set_ylabel("Longueur de la file (nb requêtes)")
     ax2.set_title("Longueur de file vs Temps")
@@ -103,9 +113,11 @@ def save_plots(times, loads, qlens, latencies, outdir):
 
     # CDF des latences
     if latencies:
-        x = np.sort(np.array(latencies))
-        y = np.linspace(0, 1, len(x), endpoint=True)
-        fig3, ax3 = plt.subplots(figsize=(10,4))
+        # Quantiles sur une grille fixe : même courbe que le tri complet, taille bornée
+        y = np.linspace(0, 1, CDF_POINTS)
+        x = np.quantile(latencies, y)
+        fig3 = Figure(figsize=(10,4))
+        ax3 = fig3.subplots()
         ax3.plot(x, y)
         ax3.set_xlabel("Latence (s)")
         ax3.set_ylabel("CDF")
@@ -116,15 +128,23 @@ def save_plots(times, loads, qlens, latencies, outdir):
         fig3.savefig(p3, dpi=200)
         print(f"Saved {p3}")
 
+def _run_one(cfg: dict) -> str:
+    """Exécute un scénario et écrit ses fichiers (appelé dans un processus worker)."""
+    name = cfg["name"]
+    outdir = os.path.join(OUT_ROOT, name)
+    print(f"\n=== Running scenario: {name} ===")
+    times, loads, qlens, latencies = run_scenario(cfg)
+    save_csv_metrics(times, loads, qlens, outdir)
+    save_csv_latencies(latencies, outdir)
+    save_plots(times, loads, qlens, latencies, outdir)
+    return name
+
 def main():
-    for cfg in SCENARIOS:
-        name = cfg["name"]
-        outdir = os.path.join(OUT_ROOT, name)
-        print(f"\n=== Running scenario: {name} ===")
-        times, loads, qlens, latencies = run_scenario(cfg)
-        save_csv_metrics(times, loads, qlens, outdir)
-        save_csv_latencies(latencies, outdir)
-        save_plots(times, loads, qlens, latencies, outdir)
+    # Scénarios indépendants (graine et ServerModel propres) : un processus chacun.
+    # 'spawn' évite de forker l'état Matplotlib du parent (non fork-safe sur macOS).
+    workers = min(len(SCENARIOS), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as ex:
+        list(ex.map(_run_one, SCENARIOS))
     print("\nAll scenarios completed.")
 
 if __name__ == "__main__":
@@ -9,55 +9,81 @@ import os
 import sys
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 
 # Dossier/scénario à analyser (modifie au besoin)
 SCENARIO_DIR = "plots/baseline"
 METRICS_CSV = os.path.join(SCENARIO_DIR, "metrics.csv")
 LAT_CSV = os.path.join(SCENARIO_DIR, "latencies.csv")
 
+# Schéma fixe des CSV produits par batch_run / simulate_and_plot
+METRICS_DTYPES = {"time_s": np.float64, "load_percent": np.float64, "queue_len": np.int64}
+LAT_DTYPES = {"latency_s": np.float64}
+
 WINDOW = 5   # taille de fenêtre pour moyenne mobile (en pas)
+CDF_POINTS = 1001   # nb de points tracés pour une CDF
+
+def _moving_avg(a, w):
+    """Moyenne mobile (fenêtre w, min_periods=1) par différence de sommes cumulées."""
+    a = np.asarray(a, dtype=float)
+    c = np.cumsum(np.insert(a, 0, 0.0))
+    out = np.empty(a.size)
+    # Début de série : fenêtre partielle, moyenne des k premiers points
+    k = min(w - 1, a.size)
+    out[:k] = c[1:k + 1] / np.arange(1, k + 1)
+    out[k:] = (c[w:] - c[:-w]) / w
+    return out
 
 def moving_average_plot(df, outpath):
     df = df.copy()
-    df["load_ma"] = df["load_percent"].rolling(WINDOW, min_periods=1).mean()
+    df["load_ma"] = _moving_avg(df["load_percent"].to_numpy(), WINDOW)
 
-    plt.figure(figsize=(10,4))
-    plt.plot(df["time_s"], df["load_percent"], label="charge (%)")
-    plt.plot(df["time_s"], df["load_ma"], label=f"moyenne mobile ({WINDOW})", linestyle="--")
-    plt.xlabel("Temps (s)")
-    plt.ylabel("Charge serveur (%)")
-    plt.title("Charge serveur (%) et moyenne mobile")
-    plt.grid(True)
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(outpath, dpi=200)
+    fig = Figure(figsize=(10,4))
+    ax = fig.subplots()
+    ax.plot(df["time_s"], df["load_percent"], label="charge (%)")
+    ax.plot(df["time_s"], df["load_ma"], label=f"moyenne mobile ({WINDOW})", linestyle="--")
+    ax.set_xlabel("Temps (s)")
+    ax.set_ylabel("Charge serveur (%)")
+    ax.set_title("Charge serveur (%) et moyenne mobile")
+    ax.grid(True)
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig(outpath, dpi=200)
     print(f"Saved {outpath}")
 
 def cdf_plot_from_series(series, xlabel, title, outpath):
-    x = np.sort(series.values.astype(float))
-    y = np.linspace(0, 1, len(x), endpoint=True)
-    plt.figure(figsize=(10,4))
-    plt.plot(x, y)
-    plt.xlabel(xlabel)
-    plt.ylabel("CDF")
-    plt.title(title)
-    plt.grid(True)
-    plt.tight_layout()
-    plt.savefig(outpath, dpi=200)
+    x = np.asarray(series, dtype=float)
+    if x.size == 0:
+        # ex. latencies.csv sans données (aucune requête traitée) : CDF vide
+        y = x
+    else:
+        # Quantiles sur une grille fixe plutôt que les N points triés
+        y = np.linspace(0, 1, CDF_POINTS)
+        x = np.quantile(x, y)
+    fig = Figure(figsize=(10,4))
+    ax = fig.subplots()
+    ax.plot(x, y)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel("CDF")
+    ax.set_title(title)
+    ax.grid(True)
+    fig.tight_layout()
+    fig.savefig(outpath, dpi=200)
     print(f"Saved {outpath}")
 
 def main():
     if not os.path.exists(METRICS_CSV):
         raise FileNotFoundError(f"Metrics file not found: {METRICS_CSV}")
 
-    df = pd.read_csv(METRICS_CSV)
+    # Types imposés : pas d'inférence de type, parseur C
+    df = pd.read_csv(METRICS_CSV, dtype=METRICS_DTYPES, engine="c", usecols=list(METRICS_DTYPES))
     # moyennes mobiles
     moving_average_plot(df, os.path.join(SCENARIO_DIR, "load_ma.png"))
 
     # CDF latence si dispo
     if os.path.exists(LAT_CSV):
-        lat = pd.read_csv(LAT_CSV)["latency_s"]
+        # Seul un tableau 1-D est nécessaire pour la CDF
+        lat = pd.read_csv(LAT_CSV, dtype=LAT_DTYPES, engine="c").to_numpy().ravel()
         cdf_plot_from_series(lat, "Latence (s)", "CDF des latences", os.path.join(SCENARIO_DIR, "latency_cdf.png"))
     else:
         # sinon CDF de la longueur de file (proxy de congestion)
@@ -4,19 +4,52 @@ Module ServerModel pour le simulateur DoS (simulation locale, pas de réseau).
 
 API :
 - RequestEvent(timestamp: float, cost: float)
-- ServerModel(processing_capacity_per_sec=50.0, warning_threshold=70.0, overload_threshold=90.0)
+- ServerModel(processing_capacity_per_sec=50.0, warning_threshold=70.0, overload_threshold=90.0,
+              keep_latency_history=False, thread_safe=True)
     - enqueue(req)
-    - step(dt) -> dict
+    - enqueue_many(costs, timestamp)
+    - step(dt, now=None) -> dict
+    - step_fast(dt, now=None) -> (processed, queue_len, current_load_percent)
     - get_state() -> (state_str, current_load_percent)
     - reset()
 
-Thread-safe : la file est protégée par un verrou.
+Thread-safe : la file est protégée par un verrou (thread_safe=True, défaut).
+Avec thread_safe=False (un seul thread produit et consomme), le verrou est
+remplacé par un contexte vide.
+Les latences sont mesurées par rapport à `now` (défaut : time.time()) ; un
+simulateur à temps discret passe son temps simulé pour des latences déterministes.
+En interne, la file est stockée en colonnes (deques parallèles de coûts et
+de timestamps) : RequestEvent ne sert qu'à l'interface publique.
 """
 import time
 import threading
 from collections import deque
+from contextlib import nullcontext
+from itertools import islice, repeat
 from dataclasses import dataclass
-from typing import Deque, List, Tuple
+from typing import Deque, List, Optional, Tuple
+
+import numpy as np
+
+# Nombre de latences récentes utilisées pour avg_latency
+LATENCY_WINDOW = 100
+
+def _drain(costs: Deque[float], timestamps: Deque[float],
+           capacity: float, now: float) -> Tuple[float, List[float]]:
+    """
+    Dépile les requêtes tant que leur coût cumulé tient dans capacity.
+    Boucle purement numérique (méthodes liées en variables locales).
+    Retourne (coût traité, latences des requêtes traitées).
+    """
+    processed_cost = 0.0
+    latencies: List[float] = []
+    pop_cost = costs.popleft
+    pop_ts = timestamps.popleft
+    add_latency = latencies.append
+    while costs and (processed_cost + costs[0]) <= capacity:
+        processed_cost += pop_cost()
+        add_latency(max(0.0, now - pop_ts()))
+    return processed_cost, latencies
 
 @dataclass
 class RequestEvent:
@@ -25,31 +58,144 @@ class RequestEvent:
     cost: float  # unités de coût (simulées)
 
 class ServerModel:
-    """Modèle simple de serveur traitant une file de RequestEvent."""
+    """Modèle simple de serveur traitant une file de requêtes (coût, timestamp)."""
     def __init__(self, processing_capacity_per_sec: float = 50.0,
                  warning_threshold: float = 70.0,
-                 overload_threshold: float = 90.0):
+                 overload_threshold: float = 90.0,
+                 keep_latency_history: bool = False,
+                 thread_safe: bool = True):
         self.capacity = float(processing_capacity_per_sec)
+        if self.capacity < 0:
+            raise ValueError("processing_capacity_per_sec must be >= 0")
         self.warning_threshold = float(warning_threshold)
         self.overload_threshold = float(overload_threshold)
 
-        self.queue: Deque[RequestEvent] = deque()
+        # file d'attente en colonnes : costs[i] et timestamps[i] décrivent la i-ème requête
+        self.costs: Deque[float] = deque()
+        self.timestamps: Deque[float] = deque()
+        self.queued_cost = 0.0       # coût total en file, maintenu incrémentalement
         self.processed = 0           # nombre total de requêtes traitées
-        self.lock = threading.Lock()
+        # simulateur mono-thread : aucun coût d'acquisition de verrou
+        self.lock = threading.Lock() if thread_safe else nullcontext()
         self.current_load = 0.0      # estimation en pourcentage
-        self.latencies: List[float] = []  # latences enregistrées (sec)
+        self._classify()             # _state : classification de current_load, mise à jour par step
+        # fenêtre glissante des dernières latences (sec) et sa somme courante
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.latency_sum = 0.0
+        self._latencies_since_sync = 0   # ajouts depuis le dernier recalcul exact de latency_sum
+        # historique complet, seulement si demandé (mémoire O(requêtes traitées))
+        self.latency_history: Optional[List[float]] = [] if keep_latency_history else None
         self.dropped = 0             # réservé si on ajoute de la perte
 
     def enqueue(self, req: RequestEvent) -> None:
         """Ajouter une requête à la file (thread-safe)."""
         if not isinstance(req, RequestEvent):
             raise TypeError("req must be RequestEvent")
+        self._enqueue_unchecked(req)
+
+    def _enqueue_unchecked(self, req: RequestEvent) -> None:
+        """enqueue() sans contrôle de type, pour les appelants internes de confiance."""
+        with self.lock:
+            self.costs.append(req.cost)
+            self.timestamps.append(req.timestamp)
+            self.queued_cost += req.cost
+
+    def enqueue_many(self, costs, timestamp: float) -> None:
+        """Ajouter un lot de requêtes de même timestamp en une seule prise de verrou."""
+        # tolist() : conversion en floats Python faite en C, sans boucle par élément
+        batch = np.asarray(costs, dtype=float).tolist()
+        with self.lock:
+            self.costs.extend(batch)
+            self.timestamps.extend(repeat(timestamp, len(batch)))
+            self.queued_cost += sum(batch)
+
+    def _advance(self, dt: float, now: float) -> Tuple[int, float]:
+        """
+        Traite la file pendant dt secondes à l'instant now et met à jour l'état interne.
+        À appeler verrou pris. Retourne (nb traités, coût traité).
+        """
+        capacity = self.capacity * dt
+        costs = self.costs
+
+        # Traiter tant que la prochaine requête tient dans la capacité restante
+        processed_cost, new_latencies = _drain(costs, self.timestamps, capacity, now)
+        processed_count = len(new_latencies)
+        self.processed += processed_count
+        self.queued_cost -= processed_cost
+
+        # stocker les latences (temps entre enqueue et traitement) en bloc :
+        # extend + sommes en C, sans second passage Python par requête
+        window = self.latencies
+        if processed_count >= LATENCY_WINDOW:
+            window.extend(new_latencies[-LATENCY_WINDOW:])
+            self.latency_sum = sum(window)
+            self._latencies_since_sync = 0
+        elif processed_count:
+            evicted = len(window) + processed_count - LATENCY_WINDOW
+            if evicted > 0:
+                # valeurs les plus anciennes, poussées hors de la fenêtre par extend
+                self.latency_sum -= sum(islice(window, evicted))
+            window.extend(new_latencies)
+            self.latency_sum += sum(new_latencies)
+            # une fenêtre entière renouvelée : recalcul exact pour annuler la dérive flottante
+            self._latencies_since_sync += processed_count
+            if self._latencies_since_sync >= LATENCY_WINDOW:
+                self.latency_sum = sum(window)
+                self._latencies_since_sync = 0
+        if self.latency_history is not None:
+            self.latency_history.extend(new_latencies)
+
+        # coût total en attente après traitement (file vide : annuler la dérive flottante)
+        if not costs:
+            self.queued_cost = 0.0
+        queued_cost = self.queued_cost
+
+        # estimation simple de la charge = queued_cost / capacity (en %)
+        if capacity > 0:
+            load_ratio = queued_cost / capacity
+            load_percent = load_ratio * 100.0
+        else:
+            load_percent = 100.0 if queued_cost > 0 else 0.0
+
+        # limiter la valeur maximale pour affichage
+        self.current_load = max(0.0, min(load_percent, 1000.0))
+
+        # classer une fois par pas : get_state() n'est plus qu'une lecture
+        self._classify()
+
+        return processed_count, processed_cost
+
+    def _classify(self) -> None:
+        """Met à jour _state depuis current_load et mémorise les seuils utilisés."""
+        warning, overload = self.warning_threshold, self.overload_threshold
+        load = self.current_load
+        if load < warning:
+            self._state = "NORMAL"
+        elif load < overload:
+            self._state = "CHARGÉ"
+        else:
+            self._state = "SURCHARGÉ"
+        self._state_thresholds = (warning, overload)
+
+    def step_fast(self, dt: float = 1.0, now: Optional[float] = None) -> Tuple[int, int, float]:
+        """
+        Variante légère de step() pour les boucles de simulation :
+        retourne le tuple (processed, queue_len, current_load_percent).
+        """
+        if dt <= 0:
+            raise ValueError("dt must be > 0")
+        if now is None:
+            now = time.time()
+
         with self.lock:
-            self.queue.append(req)
+            processed_count, _ = self._advance(dt, now)
+            return processed_count, len(self.costs), self.current_load
 
-    def step(self, dt: float = 1.0) -> dict:
+    def step(self, dt: float = 1.0, now: Optional[float] = None) -> dict:
         """
         Simuler le traitement pendant dt secondes.
+        now : instant de fin du pas, même horloge que les timestamps des requêtes
+        (temps simulé pour un simulateur à pas discrets). Défaut : time.time().
         Retourne un dict de statistiques :
         {
          'processed': int,            # nb d'éléments traités ce pas
@@ -62,63 +208,46 @@ class ServerModel:
         """
         if dt <= 0:
             raise ValueError("dt must be > 0")
-
-        with self.lock:
-            capacity = self.capacity * dt
-            processed_cost = 0.0
-            processed_count = 0
+        if now is None:
             now = time.time()
 
-            # Traiter tant que la prochaine requête tient dans la capacité restante
-            while self.queue and (processed_cost + self.queue[0].cost) <= capacity:
-                req = self.queue.popleft()
-                processed_cost += req.cost
-                processed_count += 1
-                self.processed += 1
-                # stocker la latence (temps entre enqueue et traitement)
-                self.latencies.append(max(0.0, now - req.timestamp))
-
-            # coût total en attente après traitement
-            queued_cost = sum(r.cost for r in self.queue)
-
-            # estimation simple de la charge = queued_cost / capacity (en %)
-            if capacity > 0:
-                load_ratio = queued_cost / capacity
-                load_percent = load_ratio * 100.0
-            else:
-                load_percent = 100.0 if queued_cost > 0 else 0.0
-
-            # limiter la valeur maximale pour affichage
-            self.current_load = max(0.0, min(load_percent, 1000.0))
+        with self.lock:
+            processed_count, processed_cost = self._advance(dt, now)
 
             avg_latency = None
             if self.latencies:
-                avg_latency = sum(self.latencies[-100:]) / min(len(self.latencies), 100)
+                avg_latency = self.latency_sum / len(self.latencies)
 
             return {
                 'processed': processed_count,
-                'queue_len': len(self.queue),
+                'queue_len': len(self.costs),
                 'processed_cost': processed_cost,
-                'queued_cost': queued_cost,
+                'queued_cost': self.queued_cost,
                 'avg_latency': avg_latency,
                 'current_load_percent': self.current_load,
             }
 
     def get_state(self) -> Tuple[str, float]:
-        """Renvoie l'état textuel et la charge actuelle."""
-        load = self.current_load
-        if load < self.warning_threshold:
-            return ("NORMAL", load)
-        elif load < self.overload_threshold:
-            return ("CHARGÉ", load)
-        else:
-            return ("SURCHARGÉ", load)
+        """
+        Renvoie l'état textuel (calculé au dernier pas) et la charge actuelle.
+        L'état est recalculé si les seuils ont été modifiés depuis.
+        """
+        if self._state_thresholds != (self.warning_threshold, self.overload_threshold):
+            self._classify()
+        return (self._state, self.current_load)
 
     def reset(self) -> None:
         """Réinitialise la file et les compteurs (thread-safe)."""
         with self.lock:
-            self.queue.clear()
+            self.costs.clear()
+            self.timestamps.clear()
+            self.queued_cost = 0.0
             self.processed = 0
             self.current_load = 0.0
-            self.latencies = []
+            self._classify()
+            self.latencies.clear()
+            self.latency_sum = 0.0
+            self._latencies_since_sync = 0
+            if self.latency_history is not None:
+                self.latency_history = []
             self.dropped = 0
@@ -13,11 +13,9 @@ Usage:
 """
 
 import os
-import csv
-import time
 import numpy as np
-import matplotlib.pyplot as plt
-from server_model import ServerModel, RequestEvent
+from matplotlib.figure import Figure
+from server_model import ServerModel
 
 # ---------- PARAMÈTRES MODIFIABLES ----------
 DURATION_S = 60.0          # durée totale (secondes)
@@ -28,6 +26,7 @@ MEAN_COST = 1.5            # coût moyen d'une requête (exponentielle)
 SERVER_CAPACITY = 40.0     # capacité du serveur (unités de coût / s)
 OUTPUT_DIR = "plots"       # dossier de sortie
 SEED = 12345               # graine RNG (reproductible)
+MAX_PLOT_POINTS = 2000     # nb max de points par courbe tracée
 # --------------------------------------------
 
 def ensure_output_dir(path: str) -> None:
@@ -35,31 +34,47 @@ def ensure_output_dir(path: str) -> None:
     if not os.path.exists(path):
         os.makedirs(path, exist_ok=True)
 
+def decimate(x, y, max_pts=MAX_PLOT_POINTS):
+    """
+    Sous-échantillonne (x, y) par pas régulier si la série dépasse max_pts points.
+    Le dernier point est toujours conservé pour que la courbe atteigne la fin.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if x.size <= max_pts:
+        return x, y
+    # Division arrondie au-dessus : au plus max_pts - 1 points + le dernier
+    stride = -(-(x.size - 1) // (max_pts - 1))
+    idx = np.append(np.arange(0, x.size - 1, stride), x.size - 1)
+    return x[idx], y[idx]
+
 def run_simulation():
-    """Exécute la simulation et retourne listes (times, loads, queue_lens)."""
+    """Exécute la simulation et retourne les tableaux (times, loads, queue_lens)."""
     steps = int(DURATION_S / DT)
     rng = np.random.default_rng(SEED)
-    srv = ServerModel(processing_capacity_per_sec=SERVER_CAPACITY)
-
-    times = []
-    loads = []
-    queue_lens = []
-
+    srv = ServerModel(processing_capacity_per_sec=SERVER_CAPACITY, thread_safe=False)
+
+    # Séries préallouées, remplies par indice
+    times = np.arange(steps) * DT
+    loads = np.empty(steps)
+    queue_lens = np.empty(steps, dtype=np.int64)
+
+    # Nombre d'arrivées par intervalle DT (loi de Poisson) et coûts de
+    # toutes les arrivées, tirés en un appel chacun.
+    lam = ATTACKERS * RATE_PER_ATTACKER * DT
+    arrivals_arr = rng.poisson(lam=lam, size=steps)
+    total = int(arrivals_arr.sum())
+    costs_arr = rng.exponential(MEAN_COST, size=total)
+    offset = 0
+
+    # Temps simulé : arrivées datées du début du pas, traitement à sa fin
     for i in range(steps):
-        t = i * DT
-        # Nombre d'arrivées pendant l'intervalle DT (loi de Poisson).
-        lam = ATTACKERS * RATE_PER_ATTACKER * DT
-        arrivals = int(rng.poisson(lam=lam))
-        for _ in range(arrivals):
-            cost = float(rng.exponential(MEAN_COST))
-            srv.enqueue(RequestEvent(timestamp=time.time(), cost=cost))
+        t = float(times[i])
+        arrivals = int(arrivals_arr[i])
+        srv.enqueue_many(costs_arr[offset:offset + arrivals], t)
+        offset += arrivals
 
-        stats = srv.step(dt=DT)
-        _, load = srv.get_state()
-
-        times.append(t)
-        loads.append(load)
-        queue_lens.append(stats['queue_len'])
+        _, queue_lens[i], loads[i] = srv.step_fast(dt=DT, now=t + DT)
 
     return times, loads, queue_lens
 
@@ -67,20 +82,25 @@ def save_csv(times, loads, queue_lens, outdir):
     """Enregistre les séries temporelles dans plots/metrics.csv."""
     ensure_output_dir(outdir)
     csv_path = os.path.join(outdir, "metrics.csv")
-    with open(csv_path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(["time_s", "load_percent", "queue_len"])
-        for t, l, q in zip(times, loads, queue_lens):
-            writer.writerow([f"{t:.2f}", f"{l:.3f}", q])
+    # Écriture en un seul appel, formats par colonne
+    np.savetxt(csv_path, np.column_stack([times, loads, queue_lens]),
+               fmt=["%.2f", "%.3f", "%d"], delimiter=",",
+               header="time_s,load_percent,queue_len", comments="", encoding="utf-8")
     print(f"Saved {csv_path}")
 
 def save_plots(times, loads, queue_lens, outdir):
-    """Trace et enregistre les graphiques PNG."""
+    """
+    Trace et enregistre les graphiques PNG.
+
+    Chaque appel construit ses propres Figure (sans passer par pyplot),
+    ce qui permet de l'exécuter dans un thread en parallèle de save_csv.
+    """
     ensure_output_dir(outdir)
 
     # Graphique 1 : charge (%)
-    fig1, ax1 = plt.subplots(figsize=(10, 4))
-    ax1.plot(times, loads)
+    fig1 = Figure(figsize=(10, 4))
+    ax1 = fig1.subplots()
+    ax1.plot(*decimate(times, loads))
     ax1.set_xlabel("Temps (s)")
     ax1.set_ylabel("Charge serveur (%)")
     ax1.set_title("Charge serveur (%) vs Temps")
@@ -91,8 +111,9 @@ def save_plots(times, loads, queue_lens, outdir):
     print(f"Saved {p1}")
 
     # Graphique 2 : longueur de file
-    fig2, ax2 = plt.subplots(figsize=(10, 4))
-    ax2.plot(times, queue_lens)
+    fig2 = Figure(figsize=(10, 4))
+    ax2 = fig2.subplots()
+    ax2.plot(*decimate(times, queue_lens))
     ax2.set_xlabel("Temps (s)")
     ax2.set_ylabel("Longueur de la file (nb requêtes)")
     ax2.set_title("Longueur de file vs Temps")
@@ -0,0 +1,52 @@
+# tests/test_attack_sim.py
+import numpy as np
+import pandas as pd
+import pytest
+from attack_sim import Attacker, TICK_S
+from pandas_analysis import _moving_avg
+
+def _burst_reference(a, elapsed_time):
+    # Formule d'origine de generate_burst_traffic (modulo sur le temps écoulé)
+    base = a.request_rate * a.num_attackers
+    if elapsed_time % 10.0 < 5.0:
+        return int(base * a.burst_intensity)
+    return int(base * 0.2)
+
+def test_export_round_trip(tmp_path):
+    a = Attacker(attack_mode='poisson', num_attackers=5, request_rate=10, duration=2, seed=1)
+    a.start_attack()
+    path = tmp_path / "log.csv"
+    a.export_traffic_log(str(path))
+    # Référence : l'ancien export pandas du log sous forme de dictionnaires
+    ref_path = tmp_path / "ref.csv"
+    pd.DataFrame(a.get_traffic_log()).to_csv(ref_path, index=False)
+    pd.testing.assert_frame_equal(pd.read_csv(path), pd.read_csv(ref_path))
+
+def test_same_seed_same_trace():
+    a = Attacker(attack_mode='poisson', duration=3, seed=42)
+    b = Attacker(attack_mode='poisson', duration=3, seed=42)
+    _, ta = a.simulate_fast()
+    _, tb = b.simulate_fast()
+    assert np.array_equal(ta, tb)
+    assert [a.generate_poisson_traffic(0.0) for _ in range(5)] == \
+           [b.generate_poisson_traffic(0.0) for _ in range(5)]
+
+def test_burst_matches_modulo_formula():
+    a = Attacker(attack_mode='burst', num_attackers=5, request_rate=10, duration=25, burst_intensity=5)
+    elapsed, traffic = a.simulate_fast()
+    expected = [_burst_reference(a, t) for t in elapsed.tolist()]
+    assert traffic.tolist() == expected
+    assert [a.generate_burst_traffic(t) for t in elapsed.tolist()] == expected
+
+def test_burst_follows_attribute_changes():
+    a = Attacker(attack_mode='burst', num_attackers=5, request_rate=10, duration=1)
+    a.generate_burst_traffic(0.0)
+    a.request_rate = 100
+    assert a.generate_burst_traffic(0.0) == _burst_reference(a, 0.0)
+    assert a.simulate_fast(dt=TICK_S)[1][0] == a.simulate_fast(dt=TICK_S / 2)[1][0]
+
+@pytest.mark.parametrize("n", range(7))
+def test_moving_avg_matches_pandas_rolling(n):
+    values = np.arange(n, dtype=float) ** 2
+    expected = pd.Series(values).rolling(5, min_periods=1).mean().to_numpy()
+    assert np.allclose(_moving_avg(values, 5), expected)
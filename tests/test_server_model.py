@@ -32,3 +32,80 @@ def test_get_state_thresholds():
     s.step(dt=1.0)
     state, load = s.get_state()
     assert state in ("CHARGÉ", "SURCHARGÉ")
+
+def test_enqueue_many_matches_enqueue():
+    s = ServerModel(processing_capacity_per_sec=5.0)
+    now = time.time()
+    s.enqueue_many([3.0, 3.0], now)
+    stats = s.step(dt=1.0)
+    assert stats['processed'] == 1
+    assert stats['queue_len'] == 1
+
+def test_queued_cost_tracks_pending_requests():
+    s = ServerModel(processing_capacity_per_sec=5.0)
+    now = time.time()
+    s.enqueue(RequestEvent(now, cost=3.0))
+    s.enqueue_many([3.0, 1.5], now)
+    stats = s.step(dt=1.0)
+    assert abs(stats['queued_cost'] - 4.5) < 1e-9
+    s.reset()
+    assert s.queued_cost == 0.0
+
+def test_latency_window_is_bounded():
+    s = ServerModel(processing_capacity_per_sec=1000.0, keep_latency_history=True)
+    now = time.time()
+    s.enqueue_many([1.0] * 250, now)
+    stats = s.step(dt=1.0)
+    assert len(s.latencies) == 100
+    assert len(s.latency_history) == 250
+    assert stats['avg_latency'] == sum(s.latencies) / 100
+
+def test_latency_sum_resynced_when_window_wraps():
+    s = ServerModel(processing_capacity_per_sec=10.0, thread_safe=False)
+    # 1000 latences irrégulières, une par pas : 10 renouvellements complets de la fenêtre
+    for i in range(1000):
+        t = i * 0.1
+        s.enqueue_many([0.5], t - (i % 7) * 0.013)
+        s.step_fast(dt=0.1, now=t)
+    assert s.latency_sum == sum(s.latencies)
+
+def test_step_fast_matches_step():
+    a = ServerModel(processing_capacity_per_sec=5.0)
+    b = ServerModel(processing_capacity_per_sec=5.0)
+    now = time.time()
+    for s in (a, b):
+        s.enqueue_many([3.0, 3.0], now)
+    stats = a.step(dt=1.0)
+    assert b.step_fast(dt=1.0) == (stats['processed'], stats['queue_len'], stats['current_load_percent'])
+
+def test_unlocked_model_behaves_like_locked():
+    s = ServerModel(processing_capacity_per_sec=5.0, thread_safe=False)
+    now = time.time()
+    s.enqueue(RequestEvent(now, cost=3.0))
+    s.enqueue(RequestEvent(now, cost=3.0))
+    stats = s.step(dt=1.0)
+    assert stats['processed'] == 1
+    assert stats['queue_len'] == 1
+
+def test_negative_capacity_rejected():
+    with pytest.raises(ValueError):
+        ServerModel(processing_capacity_per_sec=-1.0)
+
+def test_step_with_synthetic_time():
+    s = ServerModel(processing_capacity_per_sec=10.0, thread_safe=False)
+    s.enqueue_many([1.0, 1.0], 2.0)
+    stats = s.step(dt=0.5, now=2.5)
+    assert stats['processed'] == 2
+    assert stats['avg_latency'] == pytest.approx(0.5)
+    s.enqueue_many([1.0], 3.0)
+    processed, _, _ = s.step_fast(dt=0.5, now=3.5)
+    assert processed == 1
+    assert list(s.latencies) == pytest.approx([0.5, 0.5, 0.5])
+
+def test_get_state_follows_threshold_changes():
+    s = ServerModel(processing_capacity_per_sec=1.0, warning_threshold=50, overload_threshold=80)
+    s.enqueue(RequestEvent(time.time(), cost=10.0))
+    s.step(dt=1.0)
+    assert s.get_state()[0] == "SURCHARGÉ"
+    s.warning_threshold = s.overload_threshold = 2000.0
+    assert s.get_state()[0] == "NORMAL"